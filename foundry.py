@@ -1,9 +1,12 @@
 #!/usr/bin/env python3
 from __future__ import annotations
-import argparse, os, stat, subprocess, sys
-from datetime import datetime
+import argparse, functools, os, re, sys
 from pathlib import Path
-from string import Template
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Iterable, Iterator, Mapping
+
+if TYPE_CHECKING:
+    import subprocess
 
 ROOT = Path(__file__).resolve().parent
 TPL = ROOT / "templates"
@@ -15,49 +18,163 @@ DEFAULTS = {
     "api_prefix": "/api",
 }
 
-EXECUTABLES = {"scripts/wait-for-db.sh", "scripts/dev.sh", "scripts/migrate.sh"}
-
-BASE_LIBS = [
-    # API / Core
-    "fastapi",
-    "uvicorn[standard]",
-    "pydantic",
-    "pydantic-settings",
-    # DB
-    "sqlalchemy",
-    "asyncpg",
-    "alembic",
-    # DX/Logs/Tests
-    "structlog",
-    "pytest",
-    "pytest-asyncio",
-    "pytest-cov",
-    "ruff",
-    "mypy",
-    "pre-commit",
-]
-
-
-def render_file(src: Path, dst: Path, vars: dict) -> None:
-    dst.parent.mkdir(parents=True, exist_ok=True)
-    text = src.read_text(encoding="utf-8")
-    content = Template(text).safe_substitute(vars)
-    dst.write_text(content, encoding="utf-8")
-    rel = dst.relative_to(vars["project_dir"]) if "project_dir" in vars else dst
-    if str(rel).replace("\\", "/") in EXECUTABLES:
-        dst.chmod(dst.stat().st_mode | stat.S_IEXEC)
-
-
-def copy_templates(vars: dict) -> None:
+EXECUTABLES = frozenset({"scripts/wait-for-db.sh", "scripts/dev.sh", "scripts/migrate.sh"})
+_EXEC_SUFFIXES = tuple(p.split("/")[-1] for p in EXECUTABLES)
+
+
+def compile_subst(keys: Iterable[str]) -> re.Pattern[bytes]:
+    # Regex que casa só as chaves de vars ($$ vira $, como no string.Template). Casa direto nos bytes:
+    # placeholders são ASCII e o byte "$" nunca aparece dentro de um caractere UTF-8 multibyte,
+    # então não há decode/encode do arquivo
+    alts = "|".join(sorted(map(re.escape, keys), key=len, reverse=True)) or "(?!)"  # sem chaves: só $$
+    pattern = r"\$(?:(?P<escaped>\$)|\{(?P<braced>%s)\}|(?P<named>%s)(?![_a-zA-Z0-9]))" % (alts, alts)
+    return re.compile(pattern.encode("ascii"))
+
+
+def substitute(data: bytes, vars: Mapping[str, str], pattern: re.Pattern[bytes] | None = None) -> bytes:
+    # Equivalente ao Template(text).safe_substitute(vars) numa única passada do regex;
+    # placeholders desconhecidos (ex.: $py, ${POSTGRES_HOST}) ficam intactos.
+    # pattern: compile_subst(vars) já pronto (copy_templates compila uma vez para todos os arquivos)
+    if pattern is None:
+        pattern = compile_subst(vars)
+
+    def repl(m: re.Match) -> bytes:
+        if m.group("escaped") is not None:
+            return m.group("escaped")
+        key = (m.group("braced") or m.group("named")).decode("ascii")
+        return vars[key].encode("utf-8")
+
+    return pattern.sub(repl, data)
+
+
+def _read_tmpl(src: Path) -> tuple[bytes, bool]:
+    # Lê o .tmpl em bytes e já marca se há algum "$" (sem "$" não há o que substituir)
+    raw = src.read_bytes()
+    return raw, b"$" in raw
+
+
+class DiskWriter:
+    """Destino padrão: grava os arquivos renderizados direto no disco."""
+
+    def makedirs(self, dirs: set[Path]) -> None:
+        # Cria cada diretório único uma vez, do mais raso ao mais fundo, antes de disparar os workers
+        for d in sorted(dirs, key=lambda p: len(p.parts)):
+            os.makedirs(d, exist_ok=True)
+
+    def write(self, dst: Path, data: bytes, mode: int) -> None:
+        # os.open direto com o modo final: scripts já nascem executáveis, sem chmod/stat depois
+        fd = os.open(dst, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, mode)
+        try:
+            # os.write pode gravar menos que o pedido (ex.: disco cheio): repete até esgotar o buffer
+            view = memoryview(data)
+            while view:
+                view = view[os.write(fd, view):]
+        finally:
+            os.close(fd)
+
+    def close(self) -> None:
+        pass
+
+
+class ZipWriter:
+    """Destino alternativo a disco: grava os arquivos renderizados num único .zip (--archive)."""
+
+    def __init__(self, archive: Path, project_dir: Path) -> None:
+        import threading, time, zipfile
+
+        self.base = project_dir.parent  # entradas ficam sob <nome-do-projeto>/
+        self._zf = zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED)
+        self._zipinfo = zipfile.ZipInfo
+        self._deflated = zipfile.ZIP_DEFLATED
+        self._lock = threading.Lock()  # render_file roda em threads; ZipFile não é thread-safe
+        self._stamp = time.localtime()[:6]
+
+    def makedirs(self, dirs: set[Path]) -> None:
+        pass  # os diretórios ficam implícitos nos nomes das entradas
+
+    def write(self, dst: Path, data: bytes, mode: int) -> None:
+        info = self._zipinfo(dst.relative_to(self.base).as_posix(), self._stamp)
+        info.compress_type = self._deflated
+        # arquivo regular + permissões (0o666 -> 0o644, 0o755 mantém o exec)
+        info.external_attr = (0o100000 | (mode & 0o755)) << 16
+        with self._lock:
+            self._zf.writestr(info, data)
+
+    def close(self) -> None:
+        self._zf.close()
+
+
+_DISK = DiskWriter()
+
+
+def render_file(
+    src: Path,
+    dst: Path,
+    vars: Mapping[str, str],
+    writer: DiskWriter | ZipWriter = _DISK,
+    pattern: re.Pattern[bytes] | None = None,
+) -> None:
+    # Em disco, o diretório de dst já deve existir (copy_templates cria todos via writer.makedirs)
+    raw, has_dollar = _read_tmpl(src)
+    # Sem placeholders é só uma cópia; com placeholders substitui direto nos bytes
+    data = substitute(raw, vars, pattern) if has_dollar else raw
+    writer.write(dst, data, _file_mode(dst, vars))
+
+
+def _file_mode(dst: Path, vars: Mapping[str, str]) -> int:
+    # Checagem barata pelo nome antes da aritmética de paths (a maioria dos arquivos não é script)
+    if dst.name.endswith(_EXEC_SUFFIXES):
+        rel = dst.relative_to(vars["project_dir"]) if "project_dir" in vars else dst
+        if rel.as_posix() in EXECUTABLES:
+            return 0o755
+    return 0o666  # mesmo default de open(); a umask é aplicada pelo SO
+
+
+def _iter_tmpls(root: Path) -> Iterator[tuple[Path, str]]:
+    # Walk com os.scandir (usa d_type, sem stat extra); retorna (caminho absoluto, relativo em posix)
+    stack = [(str(root), "")]
+    while stack:
+        base, prefix = stack.pop()
+        with os.scandir(base) as it:
+            for entry in it:
+                rel = prefix + entry.name
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append((entry.path, rel + "/"))
+                elif entry.name.endswith(".tmpl") and entry.is_file(follow_symlinks=False):
+                    yield Path(entry.path), rel
+
+
+@functools.lru_cache(maxsize=None)
+def _collect_templates(root: Path) -> tuple[tuple[Path, str, bool], ...]:
+    # A árvore de templates é fixa durante o processo: um único walk, reaproveitado entre chamadas.
+    # Já guarda o destino relativo sem ".tmpl" (_iter_tmpls só retorna *.tmpl) e se ele tem ${context}
+    return tuple((src, rel[:-5], "${context}" in rel) for src, rel in _iter_tmpls(root))
+
+
+def copy_templates(vars: dict, writer: DiskWriter | ZipWriter = _DISK) -> None:
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+
     project_dir: Path = vars["project_dir"]
-    for src in TPL.rglob("*.tmpl"):
-        rel = src.relative_to(TPL)
-        rel_str = str(rel.with_suffix("")).replace("${context}", vars["context"])  # paths
-        dst = project_dir / rel_str
-        render_file(src, dst, vars)
+    # Valores já convertidos para str e congelados: os workers compartilham o mapping sem str(Path) por substituição
+    svars = MappingProxyType({k: str(v) for k, v in vars.items()})
+    pattern = compile_subst(svars)  # um único regex para todos os arquivos
+    # Monta a lista de jobs antes (sem I/O) e renderiza em paralelo: cada arquivo é independente
+    jobs: list[tuple[Path, Path]] = []
+    for src, rel_str, has_ctx in _collect_templates(TPL):
+        if has_ctx:  # paths; a maioria dos templates não tem placeholder no nome
+            rel_str = rel_str.replace("${context}", vars["context"])
+        jobs.append((src, project_dir / rel_str))
+    writer.makedirs({dst.parent for _, dst in jobs})
+    workers = max(1, min(32, (os.cpu_count() or 1) * 4, len(jobs)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(render_file, src, dst, svars, writer, pattern) for src, dst in jobs]
+        for fut in as_completed(futures):
+            fut.result()  # propaga exceções dos workers
 
 
 def run(cmd: list[str], cwd: Path | None = None, check: bool = True) -> subprocess.CompletedProcess:
+    import subprocess
+
     print("$", " ".join(cmd))
     return subprocess.run(cmd, cwd=str(cwd) if cwd else None, check=check)
 
@@ -65,68 +182,49 @@ def run(cmd: list[str], cwd: Path | None = None, check: bool = True) -> subproce
 def venv_paths(project_dir: Path):
     venv = project_dir / ".venv"
     py = venv / ("Scripts/python.exe" if os.name == "nt" else "bin/python")
-    pip = venv / ("Scripts/pip.exe" if os.name == "nt" else "bin/pip")
-    return venv, py, pip
+    return venv, py
+
+
+# Equivalente a "pip freeze": Nome==versão de cada distribuição instalada, ordenado pelo nome,
+# omitindo as mesmas ferramentas de empacotamento que o pip omite
+_FREEZE_SNIPPET = (
+    "import importlib.metadata as m, sys\n"
+    "skip = {'pip', 'setuptools', 'wheel', 'distribute'}\n"
+    "pins = {d.metadata['Name']: d.version for d in m.distributions()\n"
+    "        if d.metadata['Name'] and d.metadata['Name'].lower() not in skip}\n"
+    "sys.stdout.write(''.join(f'{n}=={v}\\n' for n, v in sorted(pins.items(), key=lambda p: p[0].lower())))\n"
+)
+
 
+def bootstrap(project_dir: Path, create_venv: bool, uv: str | None = None) -> None:
+    import subprocess
 
-def bootstrap(project_dir: Path, vars: dict, create_venv: bool) -> None:
     if create_venv:
-        run([sys.executable, "-m", "venv", ".venv"], cwd=project_dir)
-        venv, py, pip = venv_paths(project_dir)
-        # Instala libs sem versão fixa (sempre as mais novas)
-        run([str(pip), "install", "-U", *BASE_LIBS], cwd=project_dir)
-        # Gera requirements via pip freeze
-        req = run([str(pip), "freeze"], cwd=project_dir, check=True)
-        with (project_dir / "requirements.txt").open("wb") as f:
-            # subprocess.run com capture_output=False não retorna stdout; usamos outra chamada
-            pass
-        # Reexecuta freeze capturando saída
-        out = subprocess.check_output([str(pip), "freeze"], cwd=str(project_dir))
-        (project_dir / "requirements.txt").write_bytes(out)
+        # requirements.bootstrap.txt (lista das libs, sem versões) já foi renderizado por copy_templates
+        # uv: caminho já resolvido por main() (None = pip)
+        if uv:
+            # uv (resolver em Rust) quando disponível; --seed mantém o pip dentro da .venv
+            # e --python usa o mesmo interpretador do fallback com pip
+            run([uv, "venv", "--seed", "--python", sys.executable, ".venv"], cwd=project_dir)
+            _, py = venv_paths(project_dir)
+            run([uv, "pip", "install", "--python", str(py), "-U", "-r", "requirements.bootstrap.txt"], cwd=project_dir)
+        else:
+            run([sys.executable, "-m", "venv", ".venv"], cwd=project_dir)
+            _, py = venv_paths(project_dir)
+            # Instala libs sem versão fixa (sempre as mais novas) + upgrade do pip num único resolver
+            # Sem checagem de versão/prompt, preferindo wheels e sem gerar .pyc na instalação
+            run(
+                [str(py), "-m", "pip", "install", "-U", "--prefer-binary", "--disable-pip-version-check",
+                 "--no-input", "--no-compile", "pip", "-r", "requirements.bootstrap.txt"],
+                cwd=project_dir,
+            )
+        # Gera requirements numa única chamada: lista as distribuições via importlib.metadata
+        # no python da venv (sem carregar o pip), igual para uv e pip
+        with (project_dir / "requirements.txt").open("wb") as fh:
+            subprocess.run([str(py), "-c", _FREEZE_SNIPPET], cwd=str(project_dir), stdout=fh, check=True)
     else:
         print("[info] Pulei venv/instalação (use --venv para automatizar)")
 
-    # Alembic: cria estrutura com template oficial e patcha env.py
-    _, py, pip = venv_paths(project_dir)
-    run([str(py), "-m", "alembic", "init", "-t", "async", "alembic"], cwd=project_dir)
-    patch_alembic_env(project_dir, vars)
-
-
-def patch_alembic_env(project_dir: Path, vars: dict) -> None:
-    env_py = project_dir / "alembic" / "env.py"
-    if not env_py.exists():
-        print("[warn] alembic/env.py não encontrado para patch")
-        return
-    content = env_py.read_text(encoding="utf-8")
-    # Inserir import do Base/engine e do modelo do contexto
-    inject = (
-        "from app.core.db import Base, engine\n"
-        f"from app.infrastructure.{vars['context']} import models  # noqa: F401\n"
-        "target_metadata = Base.metadata\n"
-    )
-    # Remover alvos antigos e injetar nossos
-    content = content.replace("target_metadata = None\n", "")
-    # Ajeitar offline/online para usar engine existente
-    content = content.replace(
-        "def run_migrations_offline():",
-        (
-            "def run_migrations_offline():\n"
-            "    url = engine.url.render_as_string(hide_password=False)\n"
-            "    context.configure(url=url, target_metadata=Base.metadata, literal_binds=True)"
-        ),
-    )
-    content = content.replace(
-        "def run_migrations_online():",
-        (
-            "def run_migrations_online():\n"
-            "    connectable = engine.sync_engine"
-        ),
-    )
-    # Garante imports necessários
-    if "from app.core.db import Base, engine" not in content:
-        content = content.replace("from alembic import context\n", "from alembic import context\n" + inject)
-    env_py.write_text(content, encoding="utf-8")
-
 
 def parse_args() -> argparse.Namespace:
     p = argparse.ArgumentParser(description="FastAPI DDD Foundry v2 — Scaffolder (sem Poetry/Makefile, latest libs)")
@@ -134,42 +232,91 @@ def parse_args() -> argparse.Namespace:
     p.add_argument("--module", dest="module_name", default=DEFAULTS["module_name"], help="Pacote raiz (ex.: app)")
     p.add_argument("--context", dest="context", default=DEFAULTS["context"], help="Bounded context inicial (ex.: customer)")
     p.add_argument("--api-prefix", dest="api_prefix", default=DEFAULTS["api_prefix"], help="Prefixo da API (ex.: /api)")
-    p.add_argument("--venv", action="store_true", help="Criar .venv, instalar libs mais novas e gerar requirements.txt via pip freeze")
-    return p.parse_args()
+    p.add_argument("--venv", action="store_true", help="Criar .venv, instalar libs mais novas e gerar requirements.txt (mesmas pins do pip freeze)")
+    p.add_argument("--installer", choices=("pip", "uv"), default=None, help="Instalador das libs com --venv (padrão: uv se disponível, senão pip)")
+    p.add_argument("--archive", action="store_true", help="Gerar o projeto como <nome>.zip em vez de escrever no disco (não combina com --venv)")
+    args = p.parse_args()
+    # Combinações sem efeito viram erro em vez de serem ignoradas em silêncio
+    if args.archive and args.venv:
+        p.error("--archive não combina com --venv (a venv precisa do projeto em disco)")
+    if args.installer and not args.venv:
+        p.error("--installer só tem efeito com --venv")
+    return args
 
 
 def main() -> None:
     args = parse_args()
     project_dir = (Path.cwd() / args.name).resolve()
-    if project_dir.exists() and any(project_dir.iterdir()):
-        print(f"[err] diretório {project_dir} não está vazio")
-        sys.exit(2)
+    archive = project_dir.with_name(project_dir.name + ".zip") if args.archive else None
+    if archive is not None:
+        if archive.exists():
+            print(f"[err] arquivo {archive} já existe")
+            sys.exit(2)
+    elif project_dir.exists():
+        # scandir com escopo explícito: lê só a primeira entrada e fecha o handle na hora
+        with os.scandir(project_dir) as it:
+            if next(it, None) is not None:
+                print(f"[err] diretório {project_dir} não está vazio")
+                sys.exit(2)
+
+    uv = None
+    if args.venv and args.installer != "pip":
+        import shutil
+
+        # Resolve o instalador antes de renderizar: falhar aqui não deixa o projeto pela metade
+        uv = shutil.which("uv")
+        if args.installer == "uv" and not uv:
+            print("[err] --installer uv: executável 'uv' não encontrado no PATH")
+            sys.exit(2)
 
+    from datetime import datetime
+
+    now = datetime.now()
     vars = {
         "project_name": args.name,
         "module_name": args.module_name,
         "context": args.context,
         "ContextCap": args.context.capitalize(),
         "api_prefix": args.api_prefix,
-        "year": datetime.now().strftime("%Y"),
-        "date": datetime.now().strftime("%Y_%m_%d"),
+        "year": f"{now.year:04d}",
+        "date": f"{now.year:04d}_{now.month:02d}_{now.day:02d}",
         "project_dir": project_dir,
     }
 
-    print(f"[+] Gerando em {project_dir}")
-    copy_templates(vars)
+    if archive is not None:
+        # Tudo vai para um único .zip (parse_args já recusa --venv junto)
+        print(f"[+] Gerando em {archive}")
+        archive.parent.mkdir(parents=True, exist_ok=True)
+        writer = ZipWriter(archive, project_dir)
+        try:
+            copy_templates(vars, writer)
+        except BaseException:
+            # Não deixa um .zip truncado para trás (senão a próxima execução acusa "já existe")
+            writer.close()
+            archive.unlink(missing_ok=True)
+            raise
+        writer.close()
+    else:
+        print(f"[+] Gerando em {project_dir}")
+        copy_templates(vars)
 
-    # opcional: bootstrap venv + libs + alembic init
-    bootstrap(project_dir, vars, create_venv=args.venv)
+        # opcional: bootstrap venv + libs (o Alembic já vem dos templates)
+        bootstrap(project_dir, create_venv=args.venv, uv=uv)
 
-    print("\n[ok] Projeto criado!")
-    print(f"  cd {args.name}")
-    print("  cp .env.example .env  # ajuste variáveis (DB/CORS)")
+    # Resumo final montado num buffer e emitido numa única escrita
+    out = ["", "[ok] Projeto criado!"]
+    if archive is not None:
+        # As entradas ficam sob <nome>/: extrai na pasta pai do projeto para o "cd" abaixo funcionar
+        hint = f"  unzip {os.path.relpath(archive)}"
+        if project_dir.parent != Path.cwd():
+            hint += f" -d {os.path.relpath(project_dir.parent)}"
+        out.append(hint)
+    out += [f"  cd {args.name}", "  cp .env.example .env  # ajuste variáveis (DB/CORS)"]
     if not args.venv:
-        print("  python -m venv .venv && . .venv/bin/activate && pip install -U -r requirements.bootstrap.txt && pip freeze > requirements.txt")
-        print("  # depois, inicialize o Alembic manualmente se preferir:\n  python -m alembic init -t async alembic")
-    print("  # migrações e dev server:\n  ./scripts/migrate.sh\n  ./scripts/dev.sh")
-    print("  # ou Docker:\n  docker compose up -d --build")
+        out.append("  python -m venv .venv && . .venv/bin/activate && pip install -U -r requirements.bootstrap.txt && pip freeze > requirements.txt")
+    out.append("  # migrações e dev server:\n  ./scripts/migrate.sh\n  ./scripts/dev.sh")
+    out.append("  # ou Docker:\n  docker compose up -d --build")
+    sys.stdout.write("\n".join(out) + "\n")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
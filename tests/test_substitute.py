@@ -0,0 +1,40 @@
+import random
+import unittest
+from string import Template
+
+import foundry
+
+KEYS = ("project_name", "module_name", "context", "ContextCap", "api_prefix", "year", "date", "project_dir")
+# Pedaços que formam placeholders válidos, quase-válidos e texto comum (inclui UTF-8 multibyte)
+TOKENS = ("$", "$$", "{", "}", "${", "_", "x", "9", " ", "\n", "é", "ção", "Context", "project", "name", "new_key") + KEYS
+
+
+class SubstituteTest(unittest.TestCase):
+    """substitute() substitui o string.Template: a saída tem que ser idêntica ao safe_substitute."""
+
+    def assert_same(self, text: str, vars: dict) -> None:
+        expected = Template(text).safe_substitute(vars)
+        got = foundry.substitute(text.encode("utf-8"), vars).decode("utf-8")
+        self.assertEqual(got, expected, msg=repr(text))
+
+    def test_fuzz_matches_safe_substitute(self) -> None:
+        rng = random.Random(0)
+        vars = {k: f"<{k}-é>" for k in KEYS}
+        for _ in range(20000):
+            text = "".join(rng.choice(TOKENS) for _ in range(rng.randint(0, 12)))
+            self.assert_same(text, vars)
+            self.assert_same(text, {})
+
+    def test_examples(self) -> None:
+        vars = {"context": "customer", "ContextCap": "Customer"}
+        for text in ("${context}_repo", "$ContextCap$context", "$$context", "$contextX", "${POSTGRES_HOST}", "$py", "$"):
+            self.assert_same(text, vars)
+
+    def test_precompiled_pattern(self) -> None:
+        vars = {"context": "customer"}
+        pattern = foundry.compile_subst(vars)
+        self.assertEqual(foundry.substitute(b"$context ${context} $$", vars, pattern), b"customer customer $")
+
+
+if __name__ == "__main__":
+    unittest.main()